@@ -4,14 +4,14 @@
 # It's also handy because it acts as a sanity test of the APIs
 # If this works then you know that connecting to all three is working, and there's no risk of breaking your budgets.
 
+import operator
 import os
-import pathlib
 import logging
 from datetime import datetime
-from dotenv import load_dotenv
 from actual import Actual
 
 # Import from our modules package
+from modules.settings import settings
 from modules import (
     fetch_akahu_accounts,
     fetch_actual_accounts,
@@ -36,33 +36,16 @@ logging.basicConfig(
     ]
 )
 
-# Load environment variables from the parent directory's .env file
-load_dotenv(dotenv_path=pathlib.Path(__file__).parent / '.env')
-
-required_envs = [
-    'ACTUAL_SERVER_URL',
-    'ACTUAL_PASSWORD',
-    'ACTUAL_ENCRYPTION_KEY',
-    'ACTUAL_SYNC_ID',
-    'AKAHU_USER_TOKEN',
-    'AKAHU_APP_TOKEN',
-    'AKAHU_PUBLIC_KEY',
-    'OPENAI_API_KEY',
-    "YNAB_BEARER_TOKEN",
-    "YNAB_BUDGET_ID",
-]
-
-# Load environment variables into a dictionary for validation
-ENVs = {key: os.getenv(key) for key in required_envs}
-SYNC_TO_YNAB = True
-SYNC_TO_AB = True
-
-# Validate that all environment variables are loaded
-for key, value in ENVs.items():
-    if value is None:
+# Shared settings handle .env loading and validation; this script additionally
+# needs OpenAI and a YNAB budget for interactive matching
+for key in ('OPENAI_API_KEY', 'YNAB_BUDGET_ID'):
+    if os.getenv(key) is None:
         logging.error(f"Environment variable {key} is missing.")
         raise EnvironmentError(f"Missing required environment variable: {key}")
 
+SYNC_TO_YNAB = True
+SYNC_TO_AB = True
+
 def main():
     logging.info("Starting Akahu API integration script.")
 
@@ -71,10 +54,10 @@ def main():
 
     if SYNC_TO_AB:
         with Actual(
-            base_url=ENVs['ACTUAL_SERVER_URL'],
-            password=ENVs['ACTUAL_PASSWORD'],
-            file=ENVs['ACTUAL_SYNC_ID'],
-            encryption_password=ENVs['ACTUAL_ENCRYPTION_KEY']
+            base_url=settings.actual_server_url,
+            password=settings.actual_password,
+            file=settings.actual_sync_id,
+            encryption_password=settings.actual_encryption_key
         ) as actual:
             logging.info("Actual Budget API initialized successfully.")
             latest_actual_accounts = fetch_actual_accounts(actual)
@@ -113,10 +96,10 @@ def main():
         existing_ynab_accounts
     )
 
-    akahu_accounts = dict(sorted(
-        akahu_accounts.items(),
-        key=lambda x: x[1]['name'].lower()
-    ))
+    # Decorate-sort-undecorate so .lower() runs once per account, not per comparison
+    decorated = [(account['name'].lower(), account_id, account) for account_id, account in akahu_accounts.items()]
+    decorated.sort(key=operator.itemgetter(0))
+    akahu_accounts = {account_id: account for _, account_id, account in decorated}
 
     new_mapping = existing_mapping.copy()
 
@@ -17,7 +17,7 @@ from modules.webhook_handler import create_flask_app
 from modules.account_mapper import load_existing_mapping
 from modules.config import AKAHU_ENDPOINT, AKAHU_HEADERS
 from modules.config import RUN_SYNC_TO_AB, RUN_SYNC_TO_YNAB
-from modules.config import ENVs
+from modules.settings import settings
 
 # Configure logging
 logging.basicConfig(
@@ -38,15 +38,15 @@ def get_actual_client():
     """
     if RUN_SYNC_TO_AB:
         try:
-            logging.info(f"Attempting to connect to Actual server at {ENVs['ACTUAL_SERVER_URL']}")
-            
+            logging.info(f"Attempting to connect to Actual server at {settings.actual_server_url}")
+
             # Test the connection first
-            
+
             with Actual(
-                base_url=ENVs['ACTUAL_SERVER_URL'],
-                password=ENVs['ACTUAL_PASSWORD'],
-                file=ENVs['ACTUAL_SYNC_ID'],
-                encryption_password=ENVs['ACTUAL_ENCRYPTION_KEY']
+                base_url=settings.actual_server_url,
+                password=settings.actual_password,
+                file=settings.actual_sync_id,
+                encryption_password=settings.actual_encryption_key
             ) as client:
                 logging.info(f"Connected to AB: {client}")
                 yield client
@@ -77,7 +77,7 @@ def main():
         # Initialize Actual if syncing to AB
         # Create Flask app with Actual client
         app = create_flask_app(actual, mapping_list, {
-            'AKAHU_PUBLIC_KEY': ENVs['AKAHU_PUBLIC_KEY'],
+            'AKAHU_PUBLIC_KEY': settings.akahu_public_key,
             'akahu_endpoint': AKAHU_ENDPOINT,
             'akahu_headers': AKAHU_HEADERS
         })
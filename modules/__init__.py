@@ -18,6 +18,7 @@ from .account_mapper import (
 
 from .transaction_handler import (
     get_all_akahu,
+    fetch_all_akahu_accounts,
     load_transactions_into_actual,
     load_transactions_into_ynab,
     handle_tracking_account_actual,
@@ -53,6 +54,7 @@ __all__ = [
     
     # Transaction Handler
     'get_all_akahu',
+    'fetch_all_akahu_accounts',
     'load_transactions_into_actual',
     'load_transactions_into_ynab',
     'handle_tracking_account_actual',
@@ -1,9 +1,8 @@
 """Module for fetching account information from various services."""
 import os
 import logging
-import requests
 from actual.queries import get_accounts
-from modules.config import AKAHU_ENDPOINT, AKAHU_HEADERS, YNAB_ENDPOINT, YNAB_HEADERS
+from modules.config import AKAHU_ENDPOINT, AKAHU_HEADERS, AKAHU_RATE_LIMITER, AKAHU_SESSION, YNAB_ENDPOINT, YNAB_HEADERS, YNAB_RATE_LIMITER, YNAB_SESSION
 
 def is_simple_value(value):
     """Check if the value is a trivial type: int, float, str, bool, or None"""
@@ -13,7 +12,8 @@ def fetch_akahu_accounts():
     """Fetch accounts from Akahu API"""
     
     logging.info("Fetching Akahu accounts...")
-    response = requests.get(f"{AKAHU_ENDPOINT}/accounts", headers=AKAHU_HEADERS)
+    AKAHU_RATE_LIMITER.acquire()
+    response = AKAHU_SESSION.get(f"{AKAHU_ENDPOINT}/accounts", headers=AKAHU_HEADERS)
     if response.status_code != 200:
         logging.error(f"Failed to fetch Akahu accounts: {response.status_code} {response.text}")
         raise RuntimeError(f"Failed to fetch Akahu accounts: {response.status_code}")
@@ -70,8 +70,9 @@ def fetch_ynab_accounts():
         if not ynab_budget_id:
             raise ValueError("YNAB_BUDGET_ID environment variable is not set.")
 
-        accounts_json = requests.get(
-            f"{ynab_endpoint}budgets/{ynab_budget_id}/accounts", 
+        YNAB_RATE_LIMITER.acquire()
+        accounts_json = YNAB_SESSION.get(
+            f"{ynab_endpoint}budgets/{ynab_budget_id}/accounts",
             headers=ynab_headers
         ).json()
         
@@ -91,8 +92,9 @@ def fetch_ynab_accounts():
 def get_akahu_balance(akahu_account_id, akahu_endpoint, akahu_headers):
     """Fetch the balance for an Akahu account."""
     try:
-        response = requests.get(
-            f"{akahu_endpoint}/accounts/{akahu_account_id}", 
+        AKAHU_RATE_LIMITER.acquire()
+        response = AKAHU_SESSION.get(
+            f"{akahu_endpoint}/accounts/{akahu_account_id}",
             headers=akahu_headers
         )
         if response.status_code != 200:
@@ -125,7 +127,8 @@ def get_actual_balance(actual, actual_account_id):
 
 def get_ynab_balance(ynab_budget_id, ynab_account_id):
     uri = f"{YNAB_ENDPOINT}budgets/{ynab_budget_id}/accounts/{ynab_account_id}"
-    response = requests.get(uri, headers=YNAB_HEADERS)
+    YNAB_RATE_LIMITER.acquire()
+    response = YNAB_SESSION.get(uri, headers=YNAB_HEADERS)
     response.raise_for_status()
     account_info = response.json()
     return account_info['data']['account']['balance']
@@ -5,7 +5,7 @@ from datetime import datetime
 import openai
 import os
 from pathlib import Path
-from fuzzywuzzy import process
+from rapidfuzz import process
 
 # OpenAI client will be initialized in functions that need it
 
@@ -177,7 +177,7 @@ def get_fuzzy_match_suggestion(akahu_account, target_accounts, akahu_to_account_
     unmapped_accounts = []
     unmapped_indices = []
     seq_to_account = {}  # Map sequence numbers to accounts
-    logging.info("Falling back to FuzzyWuzzy for matching suggestion.")
+    logging.info("Falling back to RapidFuzz for matching suggestion.")
     
     for target_account in target_accounts:
         account_id = target_account['id']
@@ -190,7 +190,7 @@ def get_fuzzy_match_suggestion(akahu_account, target_accounts, akahu_to_account_
 
     if unmapped_accounts:
         account_names = [acc[0] for acc in unmapped_accounts]
-        best_match_name, confidence = process.extractOne(akahu_account['name'], account_names)
+        best_match_name, confidence, _ = process.extractOne(akahu_account['name'], account_names)
         if confidence >= 50:
             matched_index = account_names.index(best_match_name)
             return unmapped_accounts[matched_index][1]  # Return the sequence number
@@ -1,39 +1,42 @@
 """Module for handling configuration and environment variables."""
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-required_envs = [
-    'ACTUAL_SERVER_URL',
-    'ACTUAL_PASSWORD',
-    'ACTUAL_ENCRYPTION_KEY',
-    'ACTUAL_SYNC_ID',
-    'AKAHU_USER_TOKEN',
-    'AKAHU_APP_TOKEN',
-    'AKAHU_PUBLIC_KEY',
-    "YNAB_BEARER_TOKEN",
-]
-
-# Load environment variables into a dictionary for validation
-ENVs = {key: os.getenv(key) for key in required_envs}
-
-# Validate environment variables
-for key, value in ENVs.items():
-    if value is None:
-        raise EnvironmentError(f"Missing required environment variable: {key}")
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.rate_limiter import RateLimiter
+from modules.settings import settings
 
 # API endpoints and headers
 YNAB_ENDPOINT = "https://api.ynab.com/v1/"
-YNAB_HEADERS = {"Authorization": f"Bearer {ENVs['YNAB_BEARER_TOKEN']}"}
+YNAB_HEADERS = {"Authorization": f"Bearer {settings.ynab_bearer_token}"}
 
 AKAHU_ENDPOINT = "https://api.akahu.io/v1/"
 AKAHU_HEADERS = {
-    "Authorization": f"Bearer {ENVs['AKAHU_USER_TOKEN']}",
-    "X-Akahu-ID": ENVs['AKAHU_APP_TOKEN']
+    "Authorization": f"Bearer {settings.akahu_user_token}",
+    "X-Akahu-ID": settings.akahu_app_token
 }
 
+def _build_session(headers):
+    """Build a requests Session with keep-alive pooling and retry/backoff."""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Shared sessions so repeated API calls reuse TCP/TLS connections
+AKAHU_SESSION = _build_session(AKAHU_HEADERS)
+YNAB_SESSION = _build_session(YNAB_HEADERS)
+
+# Pace outbound calls so concurrent fetches stay under the providers' limits
+AKAHU_RATE_LIMITER = RateLimiter(requests_per_minute=60)
+YNAB_RATE_LIMITER = RateLimiter(requests_per_minute=60)
+
 # Set to false if you don't have a YNAB account, or otherwise want to dsable updating YNAB
 RUN_SYNC_TO_YNAB = True 
 # Set to false if you don't have an Actual Budget account, or otherwise want to dsable updating AB
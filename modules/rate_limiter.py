@@ -0,0 +1,31 @@
+"""Module for pacing outbound API calls below provider rate limits."""
+import collections
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter for outbound API calls.
+
+    acquire() blocks until issuing another call stays within the
+    requests-per-minute budget. Pacing proactively keeps bulk syncs from
+    running into the provider's 429 cliff; if a 429 still slips through, the
+    session retry adapter honours its Retry-After.
+    """
+
+    def __init__(self, requests_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self._window = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call can be made within the rate budget."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+                if len(self._window) < self.requests_per_minute:
+                    self._window.append(now)
+                    return
+                wait = 60 - (now - self._window[0])
+            time.sleep(wait)
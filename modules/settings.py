@@ -0,0 +1,39 @@
+"""Module for loading and validating environment configuration once."""
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+required_envs = [
+    'ACTUAL_SERVER_URL',
+    'ACTUAL_PASSWORD',
+    'ACTUAL_ENCRYPTION_KEY',
+    'ACTUAL_SYNC_ID',
+    'AKAHU_USER_TOKEN',
+    'AKAHU_APP_TOKEN',
+    'AKAHU_PUBLIC_KEY',
+    "YNAB_BEARER_TOKEN",
+]
+
+def _require(key):
+    """Fetch a required environment variable, failing fast if it is missing."""
+    value = os.getenv(key)
+    if value is None:
+        raise EnvironmentError(f"Missing required environment variable: {key}")
+    return value
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Validated environment configuration, loaded once at import."""
+    actual_server_url: str
+    actual_password: str
+    actual_encryption_key: str
+    actual_sync_id: str
+    akahu_user_token: str
+    akahu_app_token: str
+    akahu_public_key: str
+    ynab_bearer_token: str
+
+settings = Settings(**{key.lower(): _require(key) for key in required_envs})
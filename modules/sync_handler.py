@@ -1,8 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from modules.account_fetcher import get_akahu_balance, get_ynab_balance
+from modules.account_fetcher import get_akahu_balance, get_actual_balance, get_ynab_balance
 from modules.account_mapper import load_existing_mapping, save_mapping
-from modules.transaction_handler import clean_txn_for_ynab, create_adjustment_txn_ynab, get_all_akahu, handle_tracking_account_actual, load_transactions_into_actual, load_transactions_into_ynab
+from modules.transaction_handler import clean_txn_for_ynab, create_adjustment_txn_ynab, fetch_all_akahu_accounts, handle_tracking_account_actual, load_transactions_into_actual, load_transactions_into_ynab
 from modules.config import RUN_SYNC_TO_AB, RUN_SYNC_TO_YNAB, YNAB_ENDPOINT, YNAB_HEADERS, AKAHU_ENDPOINT, AKAHU_HEADERS
 
 def update_mapping_timestamps(successful_ab_syncs=None, successful_ynab_syncs=None, mapping_file="akahu_budget_mapping.json"):
@@ -27,10 +28,64 @@ def update_mapping_timestamps(successful_ab_syncs=None, successful_ynab_syncs=No
         'mapping': mappings
     }, mapping_file)
 
+# Maximum concurrent balance lookups; the shared sessions are thread-safe
+BALANCE_FETCH_WORKERS = 8
+
+def fetch_akahu_balances(akahu_account_ids):
+    """Fetch Akahu balances for several accounts concurrently."""
+    akahu_account_ids = list(akahu_account_ids)
+    if not akahu_account_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=BALANCE_FETCH_WORKERS) as executor:
+        balances = executor.map(
+            lambda account_id: get_akahu_balance(account_id, AKAHU_ENDPOINT, AKAHU_HEADERS),
+            akahu_account_ids
+        )
+        return dict(zip(akahu_account_ids, balances))
+
+def collect_balance_account_ids(mapping_list, target, tracking_only=False):
+    """List the Akahu account ids whose balance the given sync will need."""
+    account_ids = []
+    for akahu_account_id, mapping_entry in mapping_list.items():
+        if mapping_entry.get(f'{target}_do_not_map'):
+            continue
+        if not (mapping_entry.get(f'{target}_budget_id') and mapping_entry.get(f'{target}_account_id')):
+            continue
+        if tracking_only and mapping_entry.get('account_type', 'On Budget') != 'Tracking':
+            continue
+        account_ids.append(akahu_account_id)
+    return account_ids
+
+def collect_akahu_fetch_params(mapping_list, target):
+    """Build {akahu_account_id: last_synced} for the On Budget accounts that
+    will need an Akahu transaction fetch when syncing to the given target
+    ('ynab' or 'actual')."""
+    fetch_params = {}
+    for akahu_account_id, mapping_entry in mapping_list.items():
+        if mapping_entry.get(f'{target}_do_not_map'):
+            continue
+        if not (mapping_entry.get(f'{target}_budget_id') and mapping_entry.get(f'{target}_account_id')):
+            continue
+        if mapping_entry.get('account_type', 'On Budget') != 'On Budget':
+            continue
+        fetch_params[akahu_account_id] = mapping_entry.get(f'{target}_synced_datetime', '2024-01-01T00:00:00Z')
+    return fetch_params
+
 def sync_to_ynab(mapping_list):
     """Sync transactions from Akahu to YNAB."""
     successful_syncs = set()
     transactions_uploaded = 0
+    pending_txn_by_budget = {}  # ynab_budget_id -> {ynab_account_id: cleaned transaction records}
+    pending_akahu_ids = {}  # ynab_budget_id -> set of akahu account ids awaiting the batched POST
+
+    # Fetch transactions for all mapped accounts concurrently up front
+    akahu_dfs = fetch_all_akahu_accounts(
+        collect_akahu_fetch_params(mapping_list, 'ynab'),
+        AKAHU_ENDPOINT,
+        AKAHU_HEADERS
+    )
+    # Balances for the tracking accounts, fetched in parallel
+    akahu_balances = fetch_akahu_balances(collect_balance_account_ids(mapping_list, 'ynab', tracking_only=True))
 
     for akahu_account_id, mapping_entry in mapping_list.items():
         ynab_budget_id = mapping_entry.get('ynab_budget_id')
@@ -56,12 +111,8 @@ def sync_to_ynab(mapping_list):
 
         if account_type == 'Tracking':
             logging.info(f"Working on tracking account: {ynab_account_name}")
-            akahu_balance = get_akahu_balance(
-                akahu_account_id,
-                AKAHU_ENDPOINT,
-                AKAHU_HEADERS
-            )
-            
+            akahu_balance = akahu_balances[akahu_account_id]
+
             # Update the mapping with the latest balance
             mapping_entry['akahu_balance'] = akahu_balance
             
@@ -83,29 +134,29 @@ def sync_to_ynab(mapping_list):
             successful_syncs.add(akahu_account_id)
 
         elif account_type == 'On Budget':
-            akahu_df = get_all_akahu(
-                akahu_account_id,
-                AKAHU_ENDPOINT,
-                AKAHU_HEADERS,
-                last_reconciled_at
-            )
+            akahu_df = akahu_dfs.get(akahu_account_id)
 
             if akahu_df is not None and not akahu_df.empty:
-                # Clean and prepare transactions for YNAB
+                # Clean the transactions now; they are POSTed in one batch per budget
+                # below. Extend rather than assign: several Akahu accounts can map to
+                # the same YNAB account.
                 cleaned_txn = clean_txn_for_ynab(akahu_df, ynab_account_id)
-                
-                # Load transactions into YNAB
-                transactions_uploaded += load_transactions_into_ynab(
-                    cleaned_txn,
-                    mapping_entry['ynab_budget_id'],
-                    mapping_entry['ynab_account_id'],
-                    YNAB_ENDPOINT,
-                    YNAB_HEADERS
-                )
-                successful_syncs.add(akahu_account_id)
+                pending_txn_by_budget.setdefault(ynab_budget_id, {}).setdefault(ynab_account_id, []).extend(cleaned_txn)
+                pending_akahu_ids.setdefault(ynab_budget_id, set()).add(akahu_account_id)
         else:
             logging.error(f"Unknown account type for Akahu account: {akahu_account_id}")
 
+    # One POST per budget covering every account's transactions
+    for ynab_budget_id, cleaned_txn_by_account in pending_txn_by_budget.items():
+        counts = load_transactions_into_ynab(
+            cleaned_txn_by_account,
+            ynab_budget_id,
+            YNAB_ENDPOINT,
+            YNAB_HEADERS
+        )
+        transactions_uploaded += sum(counts.values())
+        successful_syncs.update(pending_akahu_ids[ynab_budget_id])
+
     if successful_syncs:
         update_mapping_timestamps(successful_ynab_syncs=successful_syncs)
     return transactions_uploaded
@@ -115,6 +166,20 @@ def sync_to_ab(actual, mapping_list):
     successful_ab_syncs = set()
     transactions_uploaded = 0
 
+    # Fetch transactions for all mapped accounts concurrently up front
+    akahu_dfs = fetch_all_akahu_accounts(
+        collect_akahu_fetch_params(mapping_list, 'actual'),
+        AKAHU_ENDPOINT,
+        AKAHU_HEADERS
+    )
+    # Balances for every mapped account, fetched in parallel
+    akahu_balances = fetch_akahu_balances(collect_balance_account_ids(mapping_list, 'actual'))
+    # Actual balances for the tracking accounts, queried once per run
+    actual_balances = {}
+    for akahu_id in collect_balance_account_ids(mapping_list, 'actual', tracking_only=True):
+        actual_account_id = mapping_list[akahu_id]['actual_account_id']
+        actual_balances[actual_account_id] = get_actual_balance(actual, actual_account_id)
+
     for akahu_account_id, mapping_entry in mapping_list.items():
         actual_account_id = mapping_entry.get('actual_account_id')
         actual_account_name = mapping_entry.get('actual_account_name')
@@ -138,25 +203,18 @@ def sync_to_ab(actual, mapping_list):
         logging.info(f"Last synced: {last_reconciled_at}")
 
         # Update balance for mapping entry
-        mapping_entry['akahu_balance'] = get_akahu_balance(
-            akahu_account_id, 
-            AKAHU_ENDPOINT, 
-            AKAHU_HEADERS
-        )
+        mapping_entry['akahu_balance'] = akahu_balances[akahu_account_id]
 
         transactions_processed = False
         
         if account_type == 'Tracking':
-            transactions_uploaded += handle_tracking_account_actual(mapping_entry, actual) # Note either 1 or 0 returned
+            transactions_uploaded += handle_tracking_account_actual(
+                mapping_entry, actual, actual_balances.get(actual_account_id)
+            ) # Note either 1 or 0 returned
             transactions_processed = True
             successful_ab_syncs.add(akahu_account_id)
         elif account_type == 'On Budget':
-            akahu_df = get_all_akahu(
-                akahu_account_id,
-                AKAHU_ENDPOINT,
-                AKAHU_HEADERS,
-                last_reconciled_at
-            )
+            akahu_df = akahu_dfs.get(akahu_account_id)
 
             if akahu_df is not None and not akahu_df.empty:
                 logging.info("About to load transactions into Actual Budget...")
@@ -1,60 +1,139 @@
 """Module for handling transaction processing and syncing."""
+import asyncio
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import decimal
 import logging
+import aiohttp
+import orjson
 import pandas as pd
 import requests
+from actual.database import Transactions
 from actual.queries import create_transaction, reconcile_transaction
+from sqlmodel import select
 
 from modules.account_fetcher import get_akahu_balance, get_actual_balance
+from modules.config import AKAHU_RATE_LIMITER, YNAB_RATE_LIMITER, YNAB_SESSION
 
-def get_all_akahu(akahu_account_id, akahu_endpoint, akahu_headers, last_reconciled_at=None):
-    """Fetch all transactions from Akahu for a given account, supporting pagination."""
-    query_params = {}
-    res = None
-    total_txn = 0
+# Maximum number of Akahu accounts fetched concurrently
+AKAHU_FETCH_CONCURRENCY = 8
 
-    if last_reconciled_at:
-        last_reconciled_at_dt = datetime.fromisoformat(last_reconciled_at.replace("Z", "+00:00"))
-        start_time = last_reconciled_at_dt - timedelta(weeks=1)
-        query_params['start'] = start_time.isoformat().replace("+00:00", "Z")
-    else:
-        query_params['start'] = "2024-01-01T00:00:00Z"
+# The only Akahu transaction fields consumed downstream
+AKAHU_TXN_FIELDS = ['_id', 'date', 'amount', 'description', 'merchant']
 
-    next_cursor = 'first time'
-    while next_cursor is not None:
-        if next_cursor != 'first time':
-            query_params['cursor'] = next_cursor
+# Shared quantum for transaction amounts; building it per row is expensive
+AMOUNT_QUANTUM = decimal.Decimal("0.0001")
 
-        try:
-            response = requests.get(
-                f"{akahu_endpoint}/accounts/{akahu_account_id}/transactions",
-                params=query_params,
-                headers=akahu_headers
-            )
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to fetch transactions from Akahu for account {akahu_account_id}: {str(e)}")
-            raise RuntimeError(f"Failed to fetch Akahu transactions: {str(e)}") from None
-
-        akahu_txn_json = response.json()
-        akahu_txn = pd.DataFrame(akahu_txn_json.get('items', []))
-        if res is None:
-            res = akahu_txn.copy()
-        else:
-            res = pd.concat([res, akahu_txn])
+# New Zealand time, DST-aware
+NZT = ZoneInfo("Pacific/Auckland")
 
-        num_txn = akahu_txn.shape[0]
-        total_txn += num_txn
-        logging.info(f"Fetched {num_txn} transactions from Akahu.")
+# Below this row count, plain-Python cleaning beats the pandas fixed overhead
+SMALL_BATCH_THRESHOLD = 500
 
-        if num_txn == 0 or 'cursor' not in akahu_txn_json or 'next' not in akahu_txn_json['cursor']:
-            next_cursor = None
-        else:
-            next_cursor = akahu_txn_json['cursor']['next']
+# How far before the last sync to re-fetch, so late-settling transactions are
+# still picked up. Akahu's start filter is on transaction date, so a
+# transaction that settles after this window would be lost for good; a week
+# comfortably covers weekend-plus-holiday settlement delays.
+RECONCILE_LOOK_BACK = timedelta(weeks=1)
+
+# Where a first-ever sync starts fetching from
+INITIAL_SYNC_START = "2024-01-01T00:00:00Z"
+
+def _extract_txn_records(items):
+    """Pull just the fields we use out of a page of Akahu transaction items."""
+    return [
+        (it['_id'], it['date'], it['amount'], it.get('description', ''), it.get('merchant'))
+        for it in items
+    ]
+
+def build_start_param(last_reconciled_at):
+    """Work out the server-side 'start' filter for an Akahu transaction fetch.
+
+    Akahu applies the filter server-side, so a tight window cuts both the
+    bytes transferred and the number of pagination round-trips.
+    """
+    if last_reconciled_at:
+        last_reconciled_at_dt = datetime.fromisoformat(last_reconciled_at.replace("Z", "+00:00"))
+        start_time = last_reconciled_at_dt - RECONCILE_LOOK_BACK
+        return start_time.isoformat().replace("+00:00", "Z")
+    return INITIAL_SYNC_START
+
+def get_all_akahu(akahu_account_id, akahu_endpoint, akahu_headers, last_reconciled_at=None):
+    """Fetch all transactions from Akahu for a given account, supporting pagination.
+
+    Synchronous wrapper over get_all_akahu_async for one-off use; the sync
+    paths fetch every account at once via fetch_all_akahu_accounts."""
+    async def _fetch():
+        async with aiohttp.ClientSession(headers=akahu_headers) as session:
+            return await get_all_akahu_async(session, akahu_account_id, akahu_endpoint, last_reconciled_at)
+    return asyncio.run(_fetch())
+
+async def get_all_akahu_async(session, akahu_account_id, akahu_endpoint, last_reconciled_at=None, semaphore=None):
+    """Async version of get_all_akahu. Pagination stays sequential within the
+    account (each page's cursor depends on the previous one), but multiple
+    accounts can be fetched concurrently by fetch_all_akahu_accounts."""
+    query_params = {'start': build_start_param(last_reconciled_at)}
+    records = []
+    total_txn = 0
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+
+    async with semaphore:
+        next_cursor = 'first time'
+        while next_cursor is not None:
+            if next_cursor != 'first time':
+                query_params['cursor'] = next_cursor
+
+            try:
+                # acquire() can sleep, so keep it off the event loop thread
+                await asyncio.to_thread(AKAHU_RATE_LIMITER.acquire)
+                async with session.get(
+                    f"{akahu_endpoint}/accounts/{akahu_account_id}/transactions",
+                    params=query_params
+                ) as response:
+                    response.raise_for_status()
+                    akahu_txn_json = orjson.loads(await response.read())
+            except aiohttp.ClientError as e:
+                logging.error(f"Failed to fetch transactions from Akahu for account {akahu_account_id}: {str(e)}")
+                raise RuntimeError(f"Failed to fetch Akahu transactions: {str(e)}") from None
+
+            items = akahu_txn_json.get('items', [])
+            records.extend(_extract_txn_records(items))
+
+            num_txn = len(items)
+            total_txn += num_txn
+            logging.info(f"Fetched {num_txn} transactions from Akahu.")
+
+            if num_txn == 0 or 'cursor' not in akahu_txn_json or 'next' not in akahu_txn_json['cursor']:
+                next_cursor = None
+            else:
+                next_cursor = akahu_txn_json['cursor']['next']
 
     logging.info(f"Finished reading {total_txn} transactions from Akahu.")
-    return res
+    return pd.DataFrame.from_records(records, columns=AKAHU_TXN_FIELDS)
+
+async def _gather_akahu_accounts(account_params, akahu_endpoint, akahu_headers):
+    """Fetch transactions for several Akahu accounts concurrently."""
+    semaphore = asyncio.Semaphore(AKAHU_FETCH_CONCURRENCY)
+    async with aiohttp.ClientSession(headers=akahu_headers) as session:
+        results = await asyncio.gather(*(
+            get_all_akahu_async(session, akahu_account_id, akahu_endpoint, last_reconciled_at, semaphore)
+            for akahu_account_id, last_reconciled_at in account_params.items()
+        ))
+    return dict(zip(account_params.keys(), results))
+
+def fetch_all_akahu_accounts(account_params, akahu_endpoint, akahu_headers):
+    """Fetch transactions for all given accounts in parallel.
+
+    account_params maps akahu_account_id -> last_reconciled_at. Returns a dict
+    of akahu_account_id -> DataFrame. Accounts are fetched concurrently (bounded
+    by AKAHU_FETCH_CONCURRENCY) so total wall-clock time is governed by the
+    slowest account rather than the sum of all of them.
+    """
+    if not account_params:
+        return {}
+    return asyncio.run(_gather_akahu_accounts(account_params, akahu_endpoint, akahu_headers))
 
 def load_transactions_into_actual(transactions, mapping_entry, actual):
     """Load transactions into Actual Budget using the mapping information."""
@@ -65,17 +144,43 @@ def load_transactions_into_actual(transactions, mapping_entry, actual):
     actual_account_id = mapping_entry['actual_account_id']
     imported_transactions = []
 
-    for _, txn in transactions.iterrows():
-        transaction_date = txn.get("date")
-        payee_name = txn.get("description")
-        notes = f"Akahu transaction: {txn.get('description')}"
-        amount = decimal.Decimal(txn.get("amount"))
-        amount = amount.quantize(decimal.Decimal("0.0001"))
-        imported_id = txn.get("_id")
-        cleared = True
+    # Parse the whole date column in one vectorized pass instead of running
+    # strptime per row, and iterate with itertuples (no per-row Series)
+    rows = transactions.assign(
+        parsed_date=pd.to_datetime(transactions['date'], format='ISO8601', utc=True).dt.date,
+        amount_dec=[decimal.Decimal(str(a)).quantize(AMOUNT_QUANTUM) for a in transactions['amount']]
+    ).rename(columns={'_id': 'imported_id'})
+
+    # One query for the imported ids already in Actual, instead of letting
+    # reconcile_transaction issue a matching SELECT per row
+    existing_ids = set(actual.session.exec(
+        select(Transactions.financial_id).where(
+            Transactions.acct == actual_account_id,
+            Transactions.financial_id.in_(list(rows['imported_id'])),
+            Transactions.tombstone == 0
+        )
+    ).all())
+
+    # Anti-join against the known ids so the loop only sees genuinely new rows
+    already_imported = rows['imported_id'].isin(existing_ids)
+    if already_imported.any():
+        logging.info(f"Skipping {int(already_imported.sum())} transactions already imported into Actual.")
+        rows = rows[~already_imported]
+
+    # The anti-join handles the bulk duplicates, but the residual rows still go
+    # through reconcile_transaction so its fuzzy matching can attach the
+    # imported id to transactions the user entered by hand (same amount within
+    # a week) instead of duplicating them. Autoflush stays on: payees are
+    # looked up by name, and without the flush a payee created for one row is
+    # invisible to the next row's lookup, duplicating payees.
+    for txn in rows.itertuples(index=False):
+        parsed_date = txn.parsed_date
+        payee_name = txn.description
+        notes = f"Akahu transaction: {txn.description}"
+        amount = txn.amount_dec
+        imported_id = txn.imported_id
 
         try:
-            parsed_date = datetime.strptime(transaction_date.replace(".000", ""), "%Y-%m-%dT%H:%M:%SZ").date()
             reconciled_transaction = reconcile_transaction(
                 actual.session,
                 date=parsed_date,
@@ -84,7 +189,7 @@ def load_transactions_into_actual(transactions, mapping_entry, actual):
                 notes=notes,
                 amount=amount,
                 imported_id=imported_id,
-                cleared=cleared,
+                cleared=True,
                 imported_payee=payee_name,
                 already_matched=imported_transactions
             )
@@ -101,8 +206,13 @@ def load_transactions_into_actual(transactions, mapping_entry, actual):
     mapping_entry['actual_synced_datetime'] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
     return len(imported_transactions)
 
-def handle_tracking_account_actual(mapping_entry, actual):
-    """Handle tracking accounts by checking and adjusting balances."""
+def handle_tracking_account_actual(mapping_entry, actual, actual_balance=None):
+    """Handle tracking accounts by checking and adjusting balances.
+
+    actual_balance can be supplied from a per-run cache (see sync_to_ab) to
+    avoid re-querying Actual for every tracking account; when omitted it is
+    fetched here.
+    """
     akahu_account_id = mapping_entry['akahu_id']
     actual_account_id = mapping_entry['actual_account_id']
     akahu_account_name = mapping_entry['akahu_name']
@@ -110,11 +220,12 @@ def handle_tracking_account_actual(mapping_entry, actual):
     try:
         logging.info(f"Handling tracking account: {akahu_account_name} (Akahu ID: {akahu_account_id})")
         akahu_balance = round(mapping_entry['akahu_balance'] * 100)
-        actual_balance = get_actual_balance(actual, actual_account_id)
+        if actual_balance is None:
+            actual_balance = get_actual_balance(actual, actual_account_id)
 
         if akahu_balance != actual_balance:
             adjustment_amount = decimal.Decimal(akahu_balance - actual_balance) / 100
-            adjustment_amount = adjustment_amount.quantize(decimal.Decimal("0.0001"))
+            adjustment_amount = adjustment_amount.quantize(AMOUNT_QUANTUM)
 
             transaction_date = datetime.utcnow().date()
             payee_name = "Balance Adjustment"
@@ -142,90 +253,119 @@ def handle_tracking_account_actual(mapping_entry, actual):
         logging.error(f"Error handling tracking account {akahu_account_name}: {str(e)}")
         raise
 
-def get_payee_name(row):
-    """Extract the payee name from the given row, prioritizing the merchant name if available."""
-    try:
-        res = None
-        if "merchant" in row and not pd.isna(row["merchant"]):
-            if "name" in row["merchant"]:
-                res = row['merchant']['name']
-        if res is None:
-            res = row['description']
-    except (TypeError, ValueError) as e:
-        logging.error(f"Error extracting payee name from row: {e}, row: {row}")
-        res = "Unknown"
-    return res
-
-def convert_to_nzt(date_str):
-    """Convert a given date string to New Zealand Time (NZT)."""
-    try:
-        if date_str is None:
-            logging.warning("Input date string is None.")
-            return None
-        # Remove milliseconds if present before parsing
-        date_str = date_str.replace(".000Z", "Z")
-        utc_time = datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ")
-        nzt_time = utc_time + timedelta(hours=13)
-        return nzt_time.strftime("%Y-%m-%d")
-    except ValueError as e:
-        logging.error(f"Error converting date string to NZT: {e}, date_str: {date_str}")
-        return None
+def _to_nzt_date(date_str):
+    """Convert a single ISO-8601 UTC timestamp to a NZ-local YYYY-MM-DD string."""
+    utc_time = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    return utc_time.astimezone(NZT).strftime("%Y-%m-%d")
 
 def clean_txn_for_ynab(akahu_txn, ynab_account_id):
-    """Clean and transform Akahu transactions to prepare them for YNAB import."""
-    akahu_txn['payee_name'] = akahu_txn.apply(get_payee_name, axis=1)
+    """Clean and transform Akahu transactions into YNAB payload records.
+
+    Returns a list of dicts ready for the YNAB transactions endpoint. A
+    typical daily sync is a handful of rows, where plain Python is faster
+    than the fixed cost of the column-wise pandas operations; large batches
+    take the vectorized path.
+    """
+    if len(akahu_txn) < SMALL_BATCH_THRESHOLD:
+        records = []
+        for it in akahu_txn.to_dict(orient='records'):
+            merchant = it.get('merchant')
+            merchant_name = merchant.get('name') if isinstance(merchant, dict) else None
+            records.append({
+                'id': it['_id'],
+                'date': _to_nzt_date(it['date']),
+                'amount': str(int(it['amount'] * 1000)),
+                'memo': it['description'],
+                'payee_name': merchant_name or it['description'],
+                'cleared': 'cleared',
+                'import_id': it['_id'],
+                'flag_color': 'red',
+                'account_id': ynab_account_id,
+            })
+        return records
+
+    # Prefer the merchant name as payee, falling back to the raw description
+    if 'merchant' in akahu_txn.columns:
+        merchant_name = akahu_txn['merchant'].map(lambda m: m.get('name') if isinstance(m, dict) else None)
+        akahu_txn['payee_name'] = merchant_name.fillna(akahu_txn['description'])
+    else:
+        akahu_txn['payee_name'] = akahu_txn['description']
     akahu_txn['memo'] = akahu_txn['description']
     akahu_txn_useful = akahu_txn[['_id', 'date', 'amount', 'memo', 'payee_name']].rename(columns={'_id': 'id'}, errors='ignore')
-    akahu_txn_useful['amount'] = akahu_txn_useful['amount'].apply(lambda x: str(int(x * 1000)))
+    akahu_txn_useful['amount'] = (akahu_txn_useful['amount'] * 1000).astype('int64').astype(str)
     akahu_txn_useful['cleared'] = 'cleared'
-    akahu_txn_useful['date'] = akahu_txn_useful.apply(lambda row: convert_to_nzt(row['date']), axis=1)
+    # Convert UTC timestamps to New Zealand Time in one vectorized pass
+    utc_dates = pd.to_datetime(akahu_txn_useful['date'], format='ISO8601', utc=True)
+    akahu_txn_useful['date'] = utc_dates.dt.tz_convert(NZT).dt.strftime('%Y-%m-%d')
     akahu_txn_useful['import_id'] = akahu_txn_useful['id']
     akahu_txn_useful['flag_color'] = 'red'
     akahu_txn_useful['account_id'] = ynab_account_id
 
-    return akahu_txn_useful
+    return akahu_txn_useful.to_dict(orient='records')
 
 def get_ynab_transactions(ynab_budget_id, ynab_endpoint, ynab_headers):
     """Fetch all transactions from YNAB for a given budget."""
     uri = f"{ynab_endpoint}budgets/{ynab_budget_id}/transactions"
     try:
-        response = requests.get(uri, headers=ynab_headers)
+        YNAB_RATE_LIMITER.acquire()
+        response = YNAB_SESSION.get(uri, headers=ynab_headers)
         response.raise_for_status()
-        return response.json().get('data', {}).get('transactions', [])
+        return orjson.loads(response.content).get('data', {}).get('transactions', [])
     except requests.exceptions.RequestException as e:
         logging.error(f"Error fetching transactions from YNAB: {e}")
         if response is not None:
             logging.error(f"API response content: {response.text}")
         raise
 
-def load_transactions_into_ynab(akahu_txn, ynab_budget_id, ynab_account_id, ynab_endpoint, ynab_headers):
-    """Save transactions from Akahu to YNAB."""
+def load_transactions_into_ynab(cleaned_txn_by_account, ynab_budget_id, ynab_endpoint, ynab_headers):
+    """Save transactions from Akahu to YNAB in one batched request.
+
+    cleaned_txn_by_account maps ynab_account_id -> list of cleaned
+    transaction records (from clean_txn_for_ynab). YNAB accepts transactions
+    for several accounts of the same budget in a single POST, so all accounts
+    are combined into one request. Returns a dict of ynab_account_id ->
+    number of transactions created.
+    """
+    transactions_list = [txn for batch in cleaned_txn_by_account.values() if batch for txn in batch]
+    if not transactions_list:
+        logging.info("No transactions to load into YNAB.")
+        return {}
+
     uri = f"{ynab_endpoint}budgets/{ynab_budget_id}/transactions"
-    transactions_list = akahu_txn.to_dict(orient='records')
 
     ynab_api_payload = {
         "transactions": transactions_list
     }
-    
+
     try:
-        response = requests.post(uri, headers=ynab_headers, json=ynab_api_payload)
+        YNAB_RATE_LIMITER.acquire()
+        # Serialize with orjson rather than letting requests run json.dumps
+        response = YNAB_SESSION.post(
+            uri,
+            headers={**ynab_headers, "Content-Type": "application/json"},
+            data=orjson.dumps(ynab_api_payload)
+        )
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to post transactions to YNAB for account {ynab_account_id}: {str(e)}")
+        logging.error(f"Failed to post transactions to YNAB for budget {ynab_budget_id}: {str(e)}")
         raise RuntimeError(f"Failed to load transactions into YNAB: {str(e)}") from None
 
-    ynab_response = response.json()
+    ynab_response = orjson.loads(response.content)
     if 'duplicate_import_ids' in ynab_response['data'] and len(ynab_response['data']['duplicate_import_ids']) > 0:
         dup_str = f"Skipped {len(ynab_response['data']['duplicate_import_ids'])} duplicates"
     else:
         dup_str = "No duplicates"
 
-    if len(ynab_response['data']['transactions']) == 0:
+    created = ynab_response['data']['transactions']
+    if len(created) == 0:
         logging.info(f"No new transactions loaded to YNAB - {dup_str}")
     else:
-        logging.info(f"Successfully loaded {len(ynab_response['data']['transactions'])} transactions to YNAB - {dup_str}")
+        logging.info(f"Successfully loaded {len(created)} transactions to YNAB - {dup_str}")
 
-    return len(ynab_response['data']['transactions'])
+    counts = {ynab_account_id: 0 for ynab_account_id in cleaned_txn_by_account}
+    for txn in created:
+        counts[txn['account_id']] = counts.get(txn['account_id'], 0) + 1
+    return counts
 
 def create_adjustment_txn_ynab(ynab_budget_id, ynab_account_id, akahu_balance, ynab_balance, ynab_endpoint, ynab_headers):
     """Create an adjustment transaction in YNAB to reconcile the balance."""
@@ -248,7 +388,12 @@ def create_adjustment_txn_ynab(ynab_budget_id, ynab_account_id, akahu_balance, y
             }
         }
         
-        response = requests.post(uri, headers=ynab_headers, json=transaction)
+        YNAB_RATE_LIMITER.acquire()
+        response = YNAB_SESSION.post(
+            uri,
+            headers={**ynab_headers, "Content-Type": "application/json"},
+            data=orjson.dumps(transaction)
+        )
         response.raise_for_status()
         logging.info(f"Created balance adjustment transaction for {balance_difference}")
         